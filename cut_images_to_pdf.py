@@ -6,12 +6,16 @@
 使用 PyObjC 实现原生 macOS GUI
 """
 
+import io
 import os
 import re
 import threading
-from queue import Queue
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import img2pdf
+import numpy as np
 from PIL import Image
-from Foundation import NSObject, NSLog, NSTimer
+from Foundation import NSObject, NSLog, NSAttributedString
 from AppKit import (NSApplication, NSWindow, NSButton, NSTextField, NSTextView,
                     NSScrollView, NSBox, NSAlert, NSOpenPanel, NSApp,
                     NSApplicationActivationPolicyRegular, NSBackingStoreBuffered,
@@ -20,16 +24,42 @@ from AppKit import (NSApplication, NSWindow, NSButton, NSTextField, NSTextView,
                     NSMakeRect, NSMakeSize, NSFont, NSColor, NSBezelBorder,
                     NSTextFieldSquareBezel, NSPushOnPushOffButton,
                     NSAlertFirstButtonReturn, NSAlertSecondButtonReturn,
+                    NSSwitchButton, NSOnState, NSOffState,
+                    NSFontAttributeName, NSForegroundColorAttributeName,
                     NSInformationalAlertStyle, NSWarningAlertStyle)
 from objc import super as objc_super
 
+# 竖向合并的多页图片像素数很容易超过PIL的防解压炸弹阈值，
+# 超过时会走告警甚至直接报错，这里的输入都是用户自己的图片，关闭该检查
+Image.MAX_IMAGE_PIXELS = None
+
+# 文件名格式: xxx-N.png / xxx-N.jpg / xxx-N.jpeg（不区分大小写）
+_SUFFIX_RE = re.compile(r'-(\d+)\.(png|jpg|jpeg)$', re.IGNORECASE)
+_BASE_RE = re.compile(r'^(.+?)-\d+\.(png|jpg|jpeg)$', re.IGNORECASE)
+_IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
+# PDF 中每页以 JPEG (DCTDecode) 存储时使用的质量和分辨率
+PDF_JPEG_QUALITY = 85
+PDF_RESOLUTION = 100.0
+
+# 同时处理的文件数（进程数）
+# 每个进程都要在内存中保留整张解码后的源图片，大图时单个进程可达1~2GB，因此设置上限
+FILE_PROCESS_WORKERS = min(os.cpu_count() or 1, 4)
+
+# 单个文件内并行保存PNG的线程数
+PNG_SAVE_WORKERS = 4
+
+# 日志视图超过 LOG_MAX_CHARS 个字符时，删除最早的内容，只保留最后 LOG_TRIM_TO_CHARS 个
+LOG_MAX_CHARS = 200_000
+LOG_TRIM_TO_CHARS = 150_000
+
 
 def extract_page_count(filename):
     """
     从文件名中提取页数
     例如: "原密协议-5.png" -> 5
     """
-    match = re.search(r'-(\d+)\.(png|jpg|jpeg|PNG|JPG|JPEG)$', filename)
+    match = _SUFFIX_RE.search(filename)
     if match:
         return int(match.group(1))
     return None
@@ -40,7 +70,7 @@ def get_base_filename(input_filename):
     获取基础文件名（不含扩展名和页数）
     例如: "原密协议-5.png" -> "原密协议"
     """
-    match = re.search(r'^(.+?)-\d+\.(png|jpg|jpeg|PNG|JPG|JPEG)$', input_filename)
+    match = _BASE_RE.search(input_filename)
     if match:
         return match.group(1)
     return None
@@ -51,77 +81,178 @@ def get_output_filename(input_filename):
     生成输出PDF文件名
     例如: "原密协议-5.png" -> "原密协议.pdf"
     """
-    return re.sub(r'-\d+\.(png|jpg|jpeg|PNG|JPG|JPEG)$', '.pdf', input_filename)
+    return _SUFFIX_RE.sub('.pdf', input_filename)
+
+
+def open_image(image_path):
+    """
+    打开并解码图片
+    """
+    img = Image.open(image_path)
+    # 先整体解码一次，之后的转换和切割共用同一份像素数据
+    img.load()
+    return img
+
+
+def is_jpeg_file(image_path):
+    """
+    判断图片是否为JPEG（只读取文件头，不解码）
+    """
+    with Image.open(image_path) as img:
+        return img.format == 'JPEG'
+
+
+def flatten_to_rgb(img):
+    """
+    将图片转换为RGB
+    带透明通道的图片先合成到白色背景上，避免透明区域在PDF中变成黑色
+    """
+    if img.mode == 'RGB':
+        return img
+    if img.mode in ('RGBA', 'LA', 'PA') or 'transparency' in img.info:
+        rgba_img = img.convert('RGBA')
+        flattened = Image.new('RGB', img.size, (255, 255, 255))
+        flattened.paste(rgba_img, mask=rgba_img)
+        rgba_img.close()
+        return flattened
+    return img.convert('RGB')
+
+
+def get_cut_boundaries(height, num_parts):
+    """
+    计算垂直切割成num_parts份时的num_parts+1条切割线
+    余下的像素均匀分到各份，最后一条切割线恰好等于图片高度
+    """
+    return np.linspace(0, height, num_parts + 1, dtype=np.int64)
 
 
 def cut_image_vertically(image_path, num_parts):
     """
     将图片垂直切割成num_parts份
-    返回切割后的图片列表
+    逐张生成切割后的RGB图片，调用方处理完一张再取下一张
+    源图片只解码并转换一次，各份取自同一数组的行切片
     """
-    img = Image.open(image_path)
-    width, height = img.size
-    
-    # 计算每一部分的高度
-    part_height = height // num_parts
-    
-    images = []
-    for i in range(num_parts):
-        # 计算切割区域
-        top = i * part_height
-        bottom = (i + 1) * part_height if i < num_parts - 1 else height
-        
-        # 切割图片
-        box = (0, top, width, bottom)
-        part_img = img.crop(box)
-        images.append(part_img)
+    with open_image(image_path) as img:
+        # PDF 页面需要RGB，在源图片上整体转换一次（RGB的JPEG无需转换），
+        # 切割出的每一份都已是RGB
+        rgb_img = flatten_to_rgb(img)
+        pixels = np.asarray(rgb_img)  # 高×宽×3 的 uint8 数组
+        rgb_img.close()
     
-    img.close()
-    return images
+    boundaries = get_cut_boundaries(pixels.shape[0], num_parts).tolist()
+    bands = deque(pixels[top:bottom] for top, bottom in zip(boundaries[:-1], boundaries[1:]))
+    del pixels
+    # 行切片是不复制数据的视图，最后一份转换成图片后整个数组随之释放
+    while bands:
+        yield Image.fromarray(bands.popleft())
 
 
-def save_cut_images(images, base_filename, output_folder):
+def save_cut_image(img, base_filename, output_folder, page_number):
     """
-    保存切割后的图片
+    保存一张切割后的图片
     """
-    saved_paths = []
-    for i, img in enumerate(images, 1):
-        output_path = os.path.join(output_folder, f"{base_filename}-第{i}页.png")
-        img.save(output_path, 'PNG')
-        saved_paths.append(output_path)
-    return saved_paths
+    output_path = os.path.join(output_folder, f"{base_filename}-第{page_number}页.png")
+    img.save(output_path, 'PNG')
+    return output_path
 
 
-def images_to_pdf(images, output_path):
+def encode_pdf_page(img):
     """
-    将图片列表转换为PDF
+    将一页RGB图片编码为JPEG字节，供 images_to_pdf 直接嵌入PDF
+    """
+    buffer = io.BytesIO()
+    img.save(buffer, 'JPEG', quality=PDF_JPEG_QUALITY)
+    return buffer.getvalue()
+
+
+def images_to_pdf(pages, output_path):
     """
-    if not images:
-        return
+    将JPEG编码的页面列表转换为PDF
+    img2pdf 直接嵌入JPEG数据，不会再次解码或编码
+    """
+    if not pages:
+        raise ValueError("没有可写入PDF的页面")
     
-    # 将所有图片转换为RGB模式（PDF需要）
-    rgb_images = []
-    for img in images:
-        if img.mode != 'RGB':
-            rgb_img = img.convert('RGB')
-            rgb_images.append(rgb_img)
+    # 页面尺寸统一按 PDF_RESOLUTION 计算，不受JPEG自带的DPI影响
+    layout_fun = img2pdf.get_fixed_dpi_layout_fun((PDF_RESOLUTION, PDF_RESOLUTION))
+    # 忽略JPEG的EXIF方向信息，与切割后重新编码的页面保持一致
+    # （也避免扫描仪写入的无效方向值导致出错）
+    with open(output_path, 'wb') as f:
+        f.write(img2pdf.convert(pages, layout_fun=layout_fun,
+                                rotation=img2pdf.Rotation.none))
+
+
+def process_one(filename, folder_path, output_folder, save_png=False):
+    """
+    处理单个图片文件（在子进程中运行）
+    save_png 为 True 时同时保存切割后的PNG图片
+    返回 (filename, ok, log_lines)，ok 为 None 表示跳过
+    """
+    log_lines = []
+    try:
+        # 提取页数
+        page_count = extract_page_count(filename)
+        if page_count is None:
+            log_lines.append(f"跳过 {filename}: 无法提取页数")
+            return filename, None, log_lines
+        if page_count < 1:
+            log_lines.append(f"跳过 {filename}: 页数必须大于0")
+            return filename, None, log_lines
+        
+        log_lines.append(f"\n处理 {filename} (共 {page_count} 页)...")
+        
+        # 完整路径
+        input_path = os.path.join(folder_path, filename)
+        
+        # 获取基础文件名
+        base_filename = get_base_filename(filename)
+        if base_filename is None:
+            log_lines.append(f"  跳过 {filename}: 无法提取基础文件名")
+            return filename, None, log_lines
+        
+        output_filename = get_output_filename(filename)
+        output_path = os.path.join(output_folder, output_filename)
+        
+        if page_count == 1 and not save_png and is_jpeg_file(input_path):
+            # 单页JPEG无需切割，原始JPEG数据直接嵌入PDF，不解码也不重新编码
+            with open(input_path, 'rb') as f:
+                pdf_pages = [f.read()]
         else:
-            rgb_images.append(img)
-    
-    # 保存为PDF
-    if len(rgb_images) > 1:
-        rgb_images[0].save(
-            output_path,
-            save_all=True,
-            append_images=rgb_images[1:],
-            resolution=100.0
-        )
-    else:
-        rgb_images[0].save(output_path)
-    
-    # 清理
-    for img in rgb_images:
-        img.close()
+            # 逐张切割：编码为PDF页面、保存PNG（可选）后立即释放，
+            # 避免所有切割后的图片同时留在内存中
+            log_lines.append(f"  正在切割图片...")
+            pdf_pages = []
+            png_futures = deque()
+            with ThreadPoolExecutor(max_workers=PNG_SAVE_WORKERS) as png_executor:
+                for page_number, tile in enumerate(cut_image_vertically(input_path, page_count), 1):
+                    pdf_pages.append(encode_pdf_page(tile))
+                    if not save_png:
+                        tile.close()
+                        continue
+                    # libpng 编码时会释放GIL，交给线程池与下一张的切割和编码重叠进行，
+                    # 保存完成后切割图片随任务一起释放
+                    png_futures.append(png_executor.submit(
+                        save_cut_image, tile, base_filename, output_folder, page_number
+                    ))
+                    # 限制等待保存的图片数量，避免切割图片在内存中堆积
+                    if len(png_futures) > PNG_SAVE_WORKERS:
+                        png_futures.popleft().result()
+                for future in png_futures:
+                    future.result()
+            log_lines.append(f"  已切割为 {len(pdf_pages)} 部分")
+            if save_png:
+                log_lines.append(f"  已保存 {len(pdf_pages)} 张图片")
+        
+        # 生成PDF
+        log_lines.append(f"  正在生成PDF: {output_filename}...")
+        images_to_pdf(pdf_pages, output_path)
+        
+        log_lines.append(f"  ✓ 完成: {output_filename}")
+        return filename, True, log_lines
+        
+    except Exception as e:
+        log_lines.append(f"  ✗ 处理 {filename} 时出错: {str(e)}")
+        return filename, False, log_lines
 
 
 class ImageCutterApp(NSObject):
@@ -135,21 +266,14 @@ class ImageCutterApp(NSObject):
         self.input_folder = ""
         self.output_folder = ""
         self.is_processing = False
-        self.log_queue = Queue()  # 日志消息队列
+        self.pending_logs = []  # 等待追加到日志视图的消息
+        self.log_lock = threading.Lock()
         
         return self
     
     def applicationDidFinishLaunching_(self, notification):
         """应用启动完成"""
         self.create_window()
-        # 启动定时器，定期检查日志队列
-        self.timer = NSTimer.scheduledTimerWithTimeInterval_target_selector_userInfo_repeats_(
-            0.1,  # 每100ms检查一次
-            self,
-            "updateLogFromQueue:",
-            None,
-            True
-        )
     
     def create_window(self):
         """创建主窗口"""
@@ -243,6 +367,13 @@ class ImageCutterApp(NSObject):
         self.process_btn.setAction_("startProcessing:")
         self.window.contentView().addSubview_(self.process_btn)
         
+        # 是否保存切割后的PNG（默认只生成PDF）
+        self.save_png_checkbox = NSButton.alloc().initWithFrame_(NSMakeRect(500, y_pos + 9, 230, 20))
+        self.save_png_checkbox.setButtonType_(NSSwitchButton)
+        self.save_png_checkbox.setTitle_("同时保存切割后的 PNG")
+        self.save_png_checkbox.setState_(NSOffState)
+        self.window.contentView().addSubview_(self.save_png_checkbox)
+        
         y_pos -= 55
         
         # 日志输出区域
@@ -263,6 +394,12 @@ class ImageCutterApp(NSObject):
         self.log_view.setEditable_(False)
         self.log_view.setSelectable_(True)
         self.log_view.setFont_(NSFont.fontWithName_size_("Menlo", 11))
+        # 日志文本的属性，清空日志后重新应用，保证字体和深色模式下的颜色不变
+        self.log_attributes = {
+            NSFontAttributeName: NSFont.fontWithName_size_("Menlo", 11),
+            NSForegroundColorAttributeName: NSColor.textColor(),
+        }
+        self.log_view.setTypingAttributes_(self.log_attributes)
         self.log_view.setTextContainerInset_(NSMakeSize(5, 5))
         scroll_view.setDocumentView_(self.log_view)
         
@@ -274,66 +411,88 @@ class ImageCutterApp(NSObject):
     
     def selectInputFolder_(self, sender):
         """选择输入文件夹"""
-        panel = NSOpenPanel.openPanel()
-        panel.setCanChooseFiles_(False)
-        panel.setCanChooseDirectories_(True)
-        panel.setAllowsMultipleSelection_(False)
-        panel.setPrompt_("选择")
-        panel.setMessage_("选择包含图片的文件夹")
-        
-        result = panel.runModal()
-        if result == 1:  # NSModalResponseOK
-            urls = panel.URLs()
-            if urls and len(urls) > 0:
-                url = urls[0]
-                path = url.path()
-                self.input_folder = path
-                self.input_field.setStringValue_(path)
-                self.input_field.setNeedsDisplay_(True)  # 强制刷新显示
-                self.appendLog_(f"已选择输入文件夹: {path}")
-                
-                # 如果输出文件夹为空，默认使用输入文件夹
-                if not self.output_folder:
-                    self.output_folder = path
-                    self.output_field.setStringValue_(path)
-                    self.output_field.setNeedsDisplay_(True)
+        panel = self.create_folder_panel("选择包含图片的文件夹")
+        # 非阻塞方式打开，面板显示期间主线程照常处理日志等事件
+        panel.beginWithCompletionHandler_(
+            lambda result: self.on_folder_chosen(panel, result, 'input')
+        )
     
     def selectOutputFolder_(self, sender):
         """选择输出文件夹"""
+        panel = self.create_folder_panel("选择输出文件夹")
+        panel.beginWithCompletionHandler_(
+            lambda result: self.on_folder_chosen(panel, result, 'output')
+        )
+    
+    def create_folder_panel(self, message):
+        """创建选择文件夹的面板"""
         panel = NSOpenPanel.openPanel()
         panel.setCanChooseFiles_(False)
         panel.setCanChooseDirectories_(True)
         panel.setAllowsMultipleSelection_(False)
         panel.setPrompt_("选择")
-        panel.setMessage_("选择输出文件夹")
-        
-        result = panel.runModal()
-        if result == 1:  # NSModalResponseOK
-            urls = panel.URLs()
-            if urls and len(urls) > 0:
-                url = urls[0]
-                path = url.path()
+        panel.setMessage_(message)
+        return panel
+    
+    def on_folder_chosen(self, panel, result, target):
+        """文件夹面板关闭回调（在主线程中调用），target 为 'input' 或 'output'"""
+        if result != 1:  # NSModalResponseOK
+            return
+        urls = panel.URLs()
+        if not urls or len(urls) == 0:
+            return
+        path = urls[0].path()
+        
+        if target == 'input':
+            self.input_folder = path
+            self.input_field.setStringValue_(path)
+            self.input_field.setNeedsDisplay_(True)  # 强制刷新显示
+            self.appendLog_(f"已选择输入文件夹: {path}")
+            
+            # 如果输出文件夹为空，默认使用输入文件夹
+            if not self.output_folder:
                 self.output_folder = path
                 self.output_field.setStringValue_(path)
-                self.output_field.setNeedsDisplay_(True)  # 强制刷新显示
-                self.appendLog_(f"已选择输出文件夹: {path}")
+                self.output_field.setNeedsDisplay_(True)
+        else:
+            self.output_folder = path
+            self.output_field.setStringValue_(path)
+            self.output_field.setNeedsDisplay_(True)  # 强制刷新显示
+            self.appendLog_(f"已选择输出文件夹: {path}")
     
     def appendLog_(self, message):
-        """添加日志信息（线程安全）- 将消息放入队列"""
-        self.log_queue.put(message)
+        """添加日志信息（线程安全）- 积攒消息并调度主线程追加"""
+        with self.log_lock:
+            self.pending_logs.append(message)
+            # 已经调度过且尚未执行时，这条消息随同一批一起追加
+            if len(self.pending_logs) > 1:
+                return
+        self.performSelectorOnMainThread_withObject_waitUntilDone_(
+            "_flushLogs:", None, False
+        )
     
-    def updateLogFromQueue_(self, timer):
-        """从队列中取出日志消息并更新UI（在主线程中调用）"""
-        try:
-            while not self.log_queue.empty():
-                message = self.log_queue.get_nowait()
-                current_text = self.log_view.string()
-                new_text = current_text + message + "\n"
-                self.log_view.setString_(new_text)
-                # 滚动到底部
-                self.log_view.scrollRangeToVisible_((len(new_text), 0))
-        except:
-            pass  # 队列为空或其他错误，忽略
+    def _flushLogs_(self, _):
+        """在主线程中把积攒的日志一次性追加到末尾，只拷贝新增的文本"""
+        with self.log_lock:
+            messages = self.pending_logs
+            self.pending_logs = []
+        if not messages:
+            return
+        
+        text_storage = self.log_view.textStorage()
+        text_storage.beginEditing()
+        # 带上日志视图的字体和颜色追加，纯文本追加会丢失 setFont_ 的设置
+        new_text = NSAttributedString.alloc().initWithString_attributes_(
+            "\n".join(messages) + "\n", self.log_view.typingAttributes()
+        )
+        text_storage.appendAttributedString_(new_text)
+        # 只保留最近的日志，避免长时间运行后内存和排版开销不断增长
+        length = text_storage.length()
+        if length > LOG_MAX_CHARS:
+            text_storage.deleteCharactersInRange_((0, length - LOG_TRIM_TO_CHARS))
+        text_storage.endEditing()
+        # 滚动到底部
+        self.log_view.scrollRangeToVisible_((text_storage.length(), 0))
     
     def startProcessing_(self, sender):
         """开始处理图片"""
@@ -344,6 +503,7 @@ class ImageCutterApp(NSObject):
         # 直接使用保存的变量而不是从TextField读取
         input_path = self.input_folder
         output_path = self.output_folder
+        save_png = self.save_png_checkbox.state() == NSOnState
         
         if not input_path:
             self.show_alert("错误", "请先选择输入文件夹！", NSWarningAlertStyle)
@@ -354,8 +514,10 @@ class ImageCutterApp(NSObject):
             self.output_folder = output_path
             self.output_field.setStringValue_(output_path)
         
-        # 清空日志
-        self.log_view.setString_("")
+        # 清空日志（直接操作 textStorage，不读取整个日志文本）
+        text_storage = self.log_view.textStorage()
+        text_storage.deleteCharactersInRange_((0, text_storage.length()))
+        self.log_view.setTypingAttributes_(self.log_attributes)
         self.appendLog_("=" * 60)
         self.appendLog_("开始处理...")
         self.appendLog_(f"输入文件夹: {input_path}")
@@ -366,11 +528,13 @@ class ImageCutterApp(NSObject):
         self.is_processing = True
         self.process_btn.setEnabled_(False)
         self.process_btn.setTitle_("处理中...")
+        # 是否保存PNG在开始时已确定，处理中不允许修改
+        self.save_png_checkbox.setEnabled_(False)
         
         # 在新线程中处理
         def process_thread():
             try:
-                success = self.process_folder(input_path, output_path)
+                success = self.process_folder(input_path, output_path, save_png)
                 self.on_processing_finished(success)
             except Exception as e:
                 self.appendLog_(f"\n错误: {str(e)}")
@@ -379,7 +543,7 @@ class ImageCutterApp(NSObject):
         thread = threading.Thread(target=process_thread, daemon=True)
         thread.start()
     
-    def process_folder(self, folder_path, output_folder):
+    def process_folder(self, folder_path, output_folder, save_png=False):
         """处理文件夹中的所有图片"""
         if not os.path.isdir(folder_path):
             self.appendLog_(f"错误: {folder_path} 不是一个有效的文件夹")
@@ -389,8 +553,12 @@ class ImageCutterApp(NSObject):
         os.makedirs(output_folder, exist_ok=True)
         
         # 获取所有图片文件
-        files = os.listdir(folder_path)
-        image_files = [f for f in files if re.search(r'-\d+\.(png|jpg|jpeg|PNG|JPG|JPEG)$', f)]
+        # 先用扩展名快速过滤，只对图片文件名做正则匹配
+        with os.scandir(folder_path) as entries:
+            image_files = [e.name for e in entries
+                           if e.is_file()
+                           and e.name.lower().endswith(_IMAGE_EXTENSIONS)
+                           and _SUFFIX_RE.search(e.name)]
         
         if not image_files:
             self.appendLog_(f"在 {folder_path} 中没有找到符合格式的图片文件")
@@ -402,71 +570,38 @@ class ImageCutterApp(NSObject):
         success_count = 0
         error_count = 0
         
-        for filename in image_files:
-            try:
-                # 提取页数
-                page_count = extract_page_count(filename)
-                if page_count is None:
-                    self.appendLog_(f"跳过 {filename}: 无法提取页数")
-                    continue
-                
-                self.appendLog_(f"\n处理 {filename} (共 {page_count} 页)...")
-                
-                # 完整路径
-                input_path = os.path.join(folder_path, filename)
-                
-                # 获取基础文件名
-                base_filename = get_base_filename(filename)
-                if base_filename is None:
-                    self.appendLog_(f"  跳过 {filename}: 无法提取基础文件名")
-                    continue
-                
-                # 切割图片
-                self.appendLog_(f"  正在切割图片...")
-                images = cut_image_vertically(input_path, page_count)
-                self.appendLog_(f"  已切割为 {len(images)} 部分")
-                
-                # 保存切割后的图片
-                self.appendLog_(f"  正在保存切割后的图片...")
-                saved_paths = save_cut_images(images, base_filename, output_folder)
-                self.appendLog_(f"  已保存 {len(saved_paths)} 张图片")
-                
-                # 生成PDF
-                output_filename = get_output_filename(filename)
-                output_path = os.path.join(output_folder, output_filename)
-                
-                self.appendLog_(f"  正在生成PDF: {output_filename}...")
-                images_to_pdf(images, output_path)
-                
-                self.appendLog_(f"  ✓ 完成: {output_filename}")
-                success_count += 1
-                
-            except Exception as e:
-                self.appendLog_(f"  ✗ 处理 {filename} 时出错: {str(e)}")
-                error_count += 1
+        # 每个文件相互独立，分发到多个进程并行处理
+        folder_paths = [folder_path] * len(image_files)
+        output_folders = [output_folder] * len(image_files)
+        save_pngs = [save_png] * len(image_files)
+        with ProcessPoolExecutor(max_workers=FILE_PROCESS_WORKERS) as executor:
+            results = executor.map(process_one, image_files, folder_paths,
+                                   output_folders, save_pngs, chunksize=1)
+            for filename, ok, log_lines in results:
+                for line in log_lines:
+                    self.appendLog_(line)
+                if ok is True:
+                    success_count += 1
+                elif ok is False:
+                    error_count += 1
         
         self.appendLog_(f"\n所有文件处理完成！成功: {success_count}, 失败: {error_count}")
         return True
     
     def on_processing_finished(self, success):
-        """处理完成回调 - 使用定时器调度UI更新"""
-        self.finish_success = success
-        # 使用单次定时器在主线程执行
-        NSTimer.scheduledTimerWithTimeInterval_target_selector_userInfo_repeats_(
-            0.01,
-            self,
-            "updateUIAfterProcessing:",
-            None,
-            False
+        """处理完成回调 - 转发到主线程更新UI"""
+        # 与日志使用同一方式调度，保证在之前的日志追加完成后执行
+        self.performSelectorOnMainThread_withObject_waitUntilDone_(
+            "updateUIAfterProcessing:", success, False
         )
     
-    def updateUIAfterProcessing_(self, timer):
+    def updateUIAfterProcessing_(self, success):
         """在主线程中更新UI"""
         self.is_processing = False
         self.process_btn.setEnabled_(True)
         self.process_btn.setTitle_("开始处理")
+        self.save_png_checkbox.setEnabled_(True)
         
-        success = getattr(self, 'finish_success', False)
         if success:
             self.show_alert("成功", "所有文件处理完成！", NSInformationalAlertStyle)
         else: